@@ -0,0 +1,123 @@
+import os
+import sys
+
+# The tools live in sibling folders and are run as standalone scripts
+_SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for _tool_dir in ('class_finder_tool', 'filestructure_gen', 'member_search'):
+    sys.path.insert(0, os.path.join(_SRC_DIR, _tool_dir))
+
+from search_classes import ClassFinder, read_file_with_encodings
+from filestructure_gen import FolderStructureWriter, read_exclude_folders
+from member_search import (
+    CSharpAnalyzer,
+    copy_frequent_referenced_files,
+    print_frequent_references,
+    save_analysis_results,
+)
+
+class TreeScanner:
+    """
+    Walks a directory tree once and dispatches every entry to a set of consumers.
+
+    Each file is read and decoded at most once, and only if at least one consumer
+    asks for its extension. A consumer provides:
+        extensions (tuple): File suffixes it wants the decoded content of
+        on_directory(root, dirs, files): Called for every os.walk entry
+        on_file(file_path, content): Called with the decoded content of a wanted file
+        finish(): Called once the walk is complete; its return value is collected
+    """
+    def __init__(self, search_directory, consumers):
+        self.search_directory = search_directory
+        self.consumers = list(consumers)
+
+    def scan(self):
+        """Run the walk and return the results of each consumer's finish()"""
+        wanted = tuple({ext for consumer in self.consumers for ext in consumer.extensions})
+
+        for root, dirs, files in os.walk(self.search_directory):
+            for consumer in self.consumers:
+                consumer.on_directory(root, dirs, files)
+
+            if not wanted:
+                continue
+
+            for file in files:
+                if not file.endswith(wanted):
+                    continue
+
+                file_path = os.path.join(root, file)
+                content = read_file_with_encodings(file_path)
+                if content is None:
+                    continue
+
+                for consumer in self.consumers:
+                    if consumer.extensions and file.endswith(consumer.extensions):
+                        consumer.on_file(file_path, content)
+
+        return [consumer.finish() for consumer in self.consumers]
+
+def build_context_package(search_directory, output_directory, class_list_str, exclude_file, dest_suffix=""):
+    """
+    Produces the folder structure, the class finder output and the C# analysis
+    for one LLM context package from a single walk of the search directory.
+
+    Args:
+        search_directory (str): Directory to scan
+        output_directory (str): Directory the package is written to
+        class_list_str (str): Comma-separated string of class names to search for
+        exclude_file (str): File listing folder names to leave out of the tree
+        dest_suffix (str, optional): Suffix to add to copied class filenames
+
+    Output layout:
+        folder_structure.txt        Tree of the search directory
+        classes/                    Files defining the requested classes
+        class_analysis_results.txt  C# member and reference analysis
+        frequent/                   Files defining frequently referenced classes
+    """
+    os.makedirs(output_directory, exist_ok=True)
+
+    # The tree writer opens its output file, so it is built last to avoid
+    # leaking the handle if the other consumers fail to set up
+    finder = ClassFinder(os.path.join(output_directory, 'classes'), class_list_str, dest_suffix)
+    analyzer = CSharpAnalyzer()
+    tree_writer = FolderStructureWriter(
+        search_directory,
+        os.path.join(output_directory, 'folder_structure.txt'),
+        read_exclude_folders(exclude_file),
+    )
+
+    print(f"Scanning {search_directory}...")
+    try:
+        _, search_results, _ = TreeScanner(search_directory, [tree_writer, finder, analyzer]).scan()
+    except Exception:
+        # Make sure the tree file handle is released if the walk fails
+        tree_writer.finish()
+        raise
+
+    print_frequent_references(analyzer)
+    # Uses the contents cached by the analyzer, so no further walk is needed
+    copy_frequent_referenced_files(analyzer, search_directory, os.path.join(output_directory, 'frequent'))
+    save_analysis_results(analyzer, os.path.join(output_directory, 'class_analysis_results.txt'))
+
+    return search_results
+
+if __name__ == "__main__":
+    if len(sys.argv) < 5:
+        print("Usage: python context_scanner.py <search_directory> <output_directory> \"<class_list>\" <exclude_file> [dest_suffix]")
+        print("Example: python context_scanner.py ./src ./context \"EditIcon,CreationEditCtrl\" exclude_folders.txt Old")
+        sys.exit(1)
+
+    dest_suffix = ""
+    if len(sys.argv) > 5:
+        dest_suffix = sys.argv[5]
+
+    results = build_context_package(sys.argv[1], sys.argv[2], sys.argv[3], sys.argv[4], dest_suffix)
+
+    print(f"\nSummary:")
+    print(f"- Found {results['total_classes_found']} out of {len(results['classes_not_found']) + results['total_classes_found']} classes")
+    print(f"- Total files: {results['total_files']}")
+    
+    if results['classes_not_found']:
+        print("\nClasses not found:")
+        for cls in results['classes_not_found']:
+            print(f"- {cls}")
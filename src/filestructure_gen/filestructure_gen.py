@@ -1,35 +1,399 @@
 import os
+import sys
+import json
+import argparse
+import stat
+from contextlib import contextmanager, nullcontext
 
-def generate_folder_structure(search_directory, output_file, exclude_file):
-    # Read exclude folders
+def read_exclude_folders(exclude_file):
+    """Read the exclude folder names, one per line"""
     exclude_folders = []
     if os.path.exists(exclude_file):
         with open(exclude_file, 'r') as f:
             exclude_folders = [line.strip() for line in f]
+    return exclude_folders
+
+class FolderStructureWriter:
+    """
+    Writes the box-drawing tree one os.walk entry at a time.
+
+    Can be fed by generate_folder_structure or by the shared scanner in
+    src/context_scanner/, which walks the tree without pruning; directories
+    below an excluded folder are skipped here instead.
+    """
+    # The tree only needs directory entries, never file contents
+    extensions = ()
+
+    def __init__(self, search_directory, output_file, exclude_folders):
+        self.search_directory = search_directory
+        self.exclude_folders = set(exclude_folders)
+        self.skipped_roots = set()
+        self.f = open(output_file, 'w', encoding='utf-8')
+
+    def on_directory(self, root, dirs, files):
+        if root in self.skipped_roots:
+            # Anything below a skipped directory is skipped as well
+            self.skipped_roots.update(os.path.join(root, d) for d in dirs)
+            return
+
+        # Remember excluded directories so their subtrees are not written
+        visible_dirs = []
+        for d in dirs:
+            if d in self.exclude_folders:
+                self.skipped_roots.add(os.path.join(root, d))
+            else:
+                visible_dirs.append(d)
+
+        level = root.replace(self.search_directory, '').count(os.sep)
+        indent = '│   ' * (level)
 
-    with open(output_file, 'w', encoding='utf-8') as f:
+        relative_path = os.path.basename(root)
+        if level == 0:
+            self.f.write(f"{relative_path}/\n")
+        else:
+            self.f.write(f"{indent[:-4]}├── {relative_path}/\n")
+
+        subindent = '│   ' * (level + 1)
+        for i, file in enumerate(sorted(files)):
+            is_last = (i == len(files) - 1) and not visible_dirs
+            prefix = '└── ' if is_last else '├── '
+            self.f.write(f"{subindent}{prefix}{file}\n")
+
+    def on_file(self, file_path, content):
+        pass
+
+    def finish(self):
+        self.f.close()
+
+def generate_folder_structure(search_directory, output_file, exclude_file):
+    exclude_folders = read_exclude_folders(exclude_file)
+
+    writer = FolderStructureWriter(search_directory, output_file, exclude_folders)
+    try:
         for root, dirs, files in os.walk(search_directory):
             # Remove excluded directories
             dirs[:] = [d for d in dirs if d not in exclude_folders]
-            
-            level = root.replace(search_directory, '').count(os.sep)
-            indent = '│   ' * (level)
-            
-            relative_path = os.path.basename(root)
-            if level == 0:
-                f.write(f"{relative_path}/\n")
+            writer.on_directory(root, dirs, files)
+    finally:
+        writer.finish()
+
+def _make_entry(path, entry_type, st):
+    """Build one snapshot record from a stat result"""
+    return {
+        "path": path,
+        "type": entry_type,
+        "size": st.st_size if entry_type == 'file' else 0,
+        "mtime": st.st_mtime,
+    }
+
+def _root_entry(st, exclude_folders):
+    """The "." record also carries the exclude list the snapshot was taken with"""
+    entry = _make_entry('.', 'dir', st)
+    entry["exclude"] = sorted(exclude_folders)
+    return entry
+
+def _snapshot_excludes(exclude_file):
+    return {name for name in read_exclude_folders(exclude_file) if name}
+
+def _child_path(rel_path, name):
+    return name if rel_path == '.' else f"{rel_path}/{name}"
+
+@contextmanager
+def _atomic_open(path):
+    """Write to a temp file that only replaces path once the write has succeeded"""
+    tmp_path = path + '.tmp'
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+def _list_directory(abs_path, exclude_folders):
+    """Return the sorted (name, type, stat) children of a directory, minus excluded folders"""
+    children = []
+    try:
+        with os.scandir(abs_path) as it:
+            for entry in it:
+                try:
+                    # Symlinks are recorded but not followed, as os.walk does
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                    if is_dir and entry.name in exclude_folders:
+                        continue
+                    children.append((entry.name, 'dir' if is_dir else 'file', entry.stat(follow_symlinks=False)))
+                except OSError:
+                    # Skip entries that vanish or cannot be stat'ed
+                    continue
+    except OSError:
+        # Unreadable directories are skipped, as os.walk does
+        return []
+    children.sort(key=lambda child: child[0])
+    return children
+
+def _walk_entries(abs_path, rel_path, exclude_folders):
+    """Yield the snapshot records below a directory, parents before their contents"""
+    # An explicit stack keeps very deep trees clear of the recursion limit; each
+    # item is a record to yield and, for directories, the path to expand after it
+    stack = [(None, abs_path, rel_path)]
+    while stack:
+        entry, dir_abs, dir_rel = stack.pop()
+        if entry is not None:
+            yield entry
+        if dir_abs is None:
+            continue
+
+        children = []
+        for name, entry_type, st in _list_directory(dir_abs, exclude_folders):
+            child_rel = _child_path(dir_rel, name)
+            child_abs = os.path.join(dir_abs, name) if entry_type == 'dir' else None
+            children.append((_make_entry(child_rel, entry_type, st), child_abs, child_rel))
+        stack.extend(reversed(children))
+
+def write_snapshot(search_directory, snapshot_file, exclude_file):
+    """
+    Streams an NDJSON snapshot of the directory tree, one record per line:
+        {"path": "components/Button.js", "type": "file", "size": 812, "mtime": 1718000000.0}
+
+    Paths are relative to search_directory and use '/' separators; the root
+    itself is recorded as "." together with the exclude list. Excluded folders
+    are left out, as in the text tree, and unreadable directories are skipped.
+    The file is only replaced once the whole snapshot has been written.
+    """
+    exclude_folders = _snapshot_excludes(exclude_file)
+
+    count = 1
+    with _atomic_open(snapshot_file) as f:
+        # scandir follows a symlinked root, so its record must describe the target
+        f.write(json.dumps(_root_entry(os.stat(search_directory), exclude_folders), ensure_ascii=False) + "\n")
+        for entry in _walk_entries(search_directory, '.', exclude_folders):
+            f.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            count += 1
+    return count
+
+def load_snapshot(snapshot_file):
+    """
+    Read an NDJSON snapshot.
+
+    Returns (entries, children): entries maps path -> record, children maps a
+    directory path -> list of its child paths in snapshot order.
+    """
+    entries = {}
+    children = {}
+    with open(snapshot_file, 'r', encoding='utf-8') as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            entry = json.loads(line)
+            path = entry["path"]
+            entries[path] = entry
+            if path != '.':
+                parent = path.rsplit('/', 1)[0] if '/' in path else '.'
+                children.setdefault(parent, []).append(path)
+    return entries, children
+
+class _SnapshotDiff:
+    """
+    Walks the tree against a loaded snapshot, yielding (change, record) pairs;
+    change is None for unchanged records, otherwise 'added', 'removed' or
+    'modified'. Records come out parents before their contents.
+
+    The walk runs off an explicit task stack rather than recursion, so very
+    deep trees cannot hit the recursion limit. A task is one of:
+        ('record', change, record)       yield the pair
+        ('removed', rel_path)            yield the recorded subtree as removed
+        ('added', abs_path, rel_path)    yield everything below a new directory as added
+        ('diff', abs_path, rel_path, st) compare a directory against the snapshot
+    """
+    def __init__(self, old_entries, old_children, exclude_folders, check_unchanged_files, reuse_listings):
+        self.old_entries = old_entries
+        self.old_children = old_children
+        self.exclude_folders = exclude_folders
+        self.check_unchanged_files = check_unchanged_files
+        self.reuse_listings = reuse_listings
+
+    def changes(self, search_directory, root_stat):
+        stack = [('diff', search_directory, '.', root_stat)]
+        while stack:
+            task = stack.pop()
+            kind = task[0]
+            if kind == 'record':
+                yield task[1], task[2]
+            elif kind == 'removed':
+                yield from self._removed_subtree(task[1])
+            elif kind == 'added':
+                for entry in _walk_entries(task[1], task[2], self.exclude_folders):
+                    yield 'added', entry
             else:
-                f.write(f"{indent[:-4]}├── {relative_path}/\n")
-            
-            subindent = '│   ' * (level + 1)
-            for i, file in enumerate(sorted(files)):
-                is_last = (i == len(files) - 1) and not dirs
-                prefix = '└── ' if is_last else '├── '
-                f.write(f"{subindent}{prefix}{file}\n")
-
-# Example usage:
-search_directory = r'F:\Projects\Glove2024\src'
-output_file = 'folder_structure.txt'
-exclude_file = 'exclude_folders.txt'
-
-generate_folder_structure(search_directory, output_file, exclude_file)
\ No newline at end of file
+                # Push in reverse so the tasks run in listing order
+                stack.extend(reversed(self._diff_directory(*task[1:])))
+
+    def _removed_subtree(self, path):
+        """Yield a removed snapshot record and everything recorded below it"""
+        stack = [path]
+        while stack:
+            current = stack.pop()
+            yield 'removed', self.old_entries[current]
+            stack.extend(reversed(self.old_children.get(current, [])))
+
+    def _diff_directory(self, abs_path, rel_path, current):
+        """Return the tasks for one directory's children"""
+        old_dir = self.old_entries.get(rel_path)
+        tasks = []
+
+        if (self.reuse_listings and old_dir is not None and old_dir["type"] == 'dir'
+                and old_dir["mtime"] == current.st_mtime):
+            # A directory's mtime only changes when entries are added, removed or
+            # renamed in it, so the recorded child list can be reused without listing it
+            for child_rel in self.old_children.get(rel_path, []):
+                old_child = self.old_entries[child_rel]
+                if old_child["type"] == 'file' and not self.check_unchanged_files:
+                    tasks.append(('record', None, old_child))
+                    continue
+
+                name = child_rel.rsplit('/', 1)[-1]
+                try:
+                    st = os.lstat(os.path.join(abs_path, name))
+                except OSError:
+                    # mtime resolution can hide a removal; fall back to reporting it
+                    tasks.append(('removed', child_rel))
+                    continue
+                # Take the type from the fresh lstat, since mtime resolution can also
+                # hide a file being replaced by a directory
+                entry_type = 'dir' if stat.S_ISDIR(st.st_mode) else 'file'
+                if entry_type == 'dir' and name in self.exclude_folders:
+                    tasks.append(('removed', child_rel))
+                    continue
+                tasks.extend(self._diff_child(abs_path, rel_path, name, entry_type, st))
+            return tasks
+
+        listed = _list_directory(abs_path, self.exclude_folders)
+        listed_names = {name for name, _, _ in listed}
+        for child_rel in self.old_children.get(rel_path, []):
+            if child_rel.rsplit('/', 1)[-1] not in listed_names:
+                tasks.append(('removed', child_rel))
+
+        for name, entry_type, st in listed:
+            tasks.extend(self._diff_child(abs_path, rel_path, name, entry_type, st))
+        return tasks
+
+    def _diff_child(self, abs_path, rel_path, name, entry_type, st):
+        """Return the tasks for one child compared against its recorded entry"""
+        child_rel = _child_path(rel_path, name)
+        child_abs = os.path.join(abs_path, name)
+        old_child = self.old_entries.get(child_rel)
+        entry = _make_entry(child_rel, entry_type, st)
+        tasks = []
+
+        if old_child is not None and old_child["type"] != entry_type:
+            # A file replaced by a directory (or the reverse) is a removal plus an addition
+            tasks.append(('removed', child_rel))
+            old_child = None
+
+        if old_child is None:
+            tasks.append(('record', 'added', entry))
+            if entry_type == 'dir':
+                tasks.append(('added', child_abs, child_rel))
+        elif entry_type == 'dir':
+            # Directory mtime changes are implied by the added and removed entries below it
+            tasks.append(('record', None, entry))
+            tasks.append(('diff', child_abs, child_rel, st))
+        elif old_child["size"] != entry["size"] or old_child["mtime"] != entry["mtime"]:
+            tasks.append(('record', 'modified', entry))
+        else:
+            tasks.append(('record', None, entry))
+        return tasks
+
+def diff_snapshot(search_directory, snapshot_file, diff_file, exclude_file, new_snapshot_file=None, check_unchanged_files=True):
+    """
+    Compares the directory tree against a saved snapshot and streams only the
+    changes to diff_file as NDJSON, each record carrying a "change" field of
+    "added", "removed" or "modified".
+
+    Directories whose mtime matches the snapshot are not listed again; their
+    recorded children are reused. Files in them are still stat'ed for size and
+    mtime changes unless check_unchanged_files is False, in which case only
+    structural changes are reported for those directories. If the exclude
+    list differs from the one recorded in the snapshot, every directory is
+    listed again so newly excluded and included folders are reported.
+
+    If new_snapshot_file is given, the current tree is written there in the
+    same pass, ready to be diffed against next time. Both files are only
+    replaced once the whole diff has been written.
+
+    Returns a dict with the number of added, removed and modified entries.
+    """
+    exclude_folders = _snapshot_excludes(exclude_file)
+    old_entries, old_children = load_snapshot(snapshot_file)
+
+    # Recorded listings are only valid for the exclude list they were taken with
+    old_root = old_entries.get('.', {})
+    reuse_listings = old_root.get("exclude") == sorted(exclude_folders)
+
+    counts = {'added': 0, 'removed': 0, 'modified': 0}
+    # Follow a symlinked root, as scandir does; only children are lstat'ed
+    root_stat = os.stat(search_directory)
+    snapshot_context = _atomic_open(new_snapshot_file) if new_snapshot_file else nullcontext()
+    with _atomic_open(diff_file) as f, snapshot_context as snapshot_out:
+        if snapshot_out:
+            snapshot_out.write(json.dumps(_root_entry(root_stat, exclude_folders), ensure_ascii=False) + "\n")
+
+        differ = _SnapshotDiff(old_entries, old_children, exclude_folders, check_unchanged_files, reuse_listings)
+        changes = differ.changes(search_directory, root_stat)
+        for change, entry in changes:
+            if change is not None:
+                f.write(json.dumps({"change": change, **entry}, ensure_ascii=False) + "\n")
+                counts[change] += 1
+            if snapshot_out and change != 'removed':
+                snapshot_out.write(json.dumps(entry, ensure_ascii=False) + "\n")
+
+    return counts
+
+def main(argv=None):
+    """Command-line entry point for the snapshot and diff modes"""
+    default_exclude_file = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'exclude_folders.txt')
+
+    parser = argparse.ArgumentParser(description="Write or diff NDJSON snapshots of a directory tree.")
+    subparsers = parser.add_subparsers(dest='mode', required=True)
+
+    snapshot_parser = subparsers.add_parser('snapshot', help="Write a snapshot of the tree")
+    snapshot_parser.add_argument('search_directory')
+    snapshot_parser.add_argument('snapshot_file')
+
+    diff_parser = subparsers.add_parser('diff', help="Diff the tree against a saved snapshot")
+    diff_parser.add_argument('search_directory')
+    diff_parser.add_argument('snapshot_file')
+    diff_parser.add_argument('diff_file')
+    diff_parser.add_argument('--new-snapshot', metavar='FILE',
+                             help="Also write the current tree as a new snapshot")
+    diff_parser.add_argument('--structure-only', action='store_true',
+                             help="Do not stat files in directories whose mtime is unchanged; "
+                                  "faster, but edits to those files are not reported")
+
+    for subparser in (snapshot_parser, diff_parser):
+        subparser.add_argument('--exclude-file', default=default_exclude_file,
+                               help="Folder names to leave out (default: exclude_folders.txt next to this script)")
+
+    args = parser.parse_args(argv)
+
+    if args.mode == 'snapshot':
+        count = write_snapshot(args.search_directory, args.snapshot_file, args.exclude_file)
+        print(f"Wrote {count} entries to {args.snapshot_file}")
+    else:
+        counts = diff_snapshot(args.search_directory, args.snapshot_file, args.diff_file, args.exclude_file,
+                               args.new_snapshot, check_unchanged_files=not args.structure_only)
+        print(f"Added: {counts['added']} Removed: {counts['removed']} Modified: {counts['modified']}")
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        main()
+        sys.exit(0)
+
+    # Example usage:
+    search_directory = r'F:\Projects\Glove2024\src'
+    output_file = 'folder_structure.txt'
+    exclude_file = 'exclude_folders.txt'
+
+    generate_folder_structure(search_directory, output_file, exclude_file)
@@ -22,6 +22,9 @@ class ClassStructure:
     static_referenced_by: Set[str] = field(default_factory=set)  # New field for static references
 
 class CSharpAnalyzer:
+    # Only C# files are analyzed when fed by the shared scanner
+    extensions = ('.cs',)
+
     def __init__(self):
         self.class_dict: Dict[str, ClassStructure] = {}
         self.class_contents: Dict[str, str] = {}
@@ -50,6 +53,11 @@ class CSharpAnalyzer:
             print(f"Warning: Could not read {file_path} with any supported encoding. Skipping file.")
             return
             
+        self.analyze_content(file_path, content)
+
+    def analyze_content(self, file_path: str, content: str) -> None:
+        """Extract class information from already-decoded file content"""
+        self.current_file = file_path
         try:
             self.class_contents[file_path] = content
             content_no_comments = self._remove_comments(content)
@@ -70,6 +78,20 @@ class CSharpAnalyzer:
         except Exception as e:
             print(f"Error processing file content {file_path}: {e}")
 
+    # Consumer interface for the shared scanner in src/context_scanner/
+    def on_directory(self, root: str, dirs: List[str], files: List[str]) -> None:
+        pass
+
+    def on_file(self, file_path: str, content: str) -> None:
+        print(f"Analyzing structure: {file_path}")
+        self.analyze_content(file_path, content)
+
+    def finish(self) -> None:
+        """Run the reference passes once every file has been analyzed"""
+        print("\nAnalyzing class references...")
+        self.analyze_references()
+        self.analyze_static_references()
+
     def _find_static_members(self, class_content: str, class_name: str) -> None:
         """Find all static methods and properties in the class content"""
         # Find static methods
@@ -288,12 +310,8 @@ def search_and_analyze_csharp_files(search_directory: str) -> CSharpAnalyzer:
                 print(f"Analyzing structure: {file_path}")
                 analyzer.analyze_file(file_path)
     
-    # Second pass: analyze references
-    print("\nAnalyzing class references...")
-    analyzer.analyze_references()
-    
-    # Add this line to analyze static references
-    analyzer.analyze_static_references()  # <-- Missing!
+    # Second pass: analyze instance and static references
+    analyzer.finish()
 
     return analyzer
 
@@ -442,7 +460,8 @@ def copy_frequent_referenced_files(analyzer: CSharpAnalyzer, search_directory: s
     
     Parameters:
     - analyzer: CSharpAnalyzer instance containing the analysis results
-    - search_directory: Root directory to search for .cs files
+    - search_directory: Root directory the .cs files were analyzed from; only
+      analyzed files under it are considered
     - destination_directory: Directory where to copy the files
     """
     # Ensure the destination directory exists
@@ -461,41 +480,23 @@ def copy_frequent_referenced_files(analyzer: CSharpAnalyzer, search_directory: s
     copied_files = set()
     files_copied = 0
 
-    for root, _, files in os.walk(search_directory):
-        for file in files:
-            if not file.endswith('.cs'):
-                continue
-                
-            file_path = os.path.join(root, file)
-            content = None
-            encodings = ['utf-8', 'gb2312', 'gbk', 'iso-8859-1']
-            
-            # Try different encodings
-            for encoding in encodings:
-                try:
-                    with open(file_path, 'r', encoding=encoding) as f:
-                        content = f.read()
-                        break
-                except UnicodeDecodeError:
-                    continue
-                except Exception as e:
-                    print(f"Error accessing file {file_path}: {e}")
-                    break
-            
-            if content is None:
-                print(f"Warning: Could not read {file_path} with any supported encoding. Skipping file.")
-                continue
+    # Reuse the contents decoded during analysis instead of walking and
+    # decoding the search directory a second time
+    search_root = os.path.abspath(search_directory)
+    for file_path, content in analyzer.class_contents.items():
+        if not os.path.abspath(file_path).startswith(os.path.join(search_root, '')):
+            continue
                     
-            # Check if the file contains any of the frequently referenced classes
-            for class_name in frequent_classes:
-                class_pattern = fr'(?:public|private)\s+class\s+{class_name}\b'
-                if re.search(class_pattern, content):
-                    if file_path not in copied_files:
-                        shutil.copy(file_path, destination_directory)
-                        copied_files.add(file_path)
-                        files_copied += 1
-                        print(f"Copied: {file_path} -> {destination_directory}")
-                        break
+        # Check if the file contains any of the frequently referenced classes
+        for class_name in frequent_classes:
+            class_pattern = fr'(?:public|private)\s+class\s+{class_name}\b'
+            if re.search(class_pattern, content):
+                if file_path not in copied_files:
+                    shutil.copy(file_path, destination_directory)
+                    copied_files.add(file_path)
+                    files_copied += 1
+                    print(f"Copied: {file_path} -> {destination_directory}")
+                    break
 
 def main():
     search_directory = 'Projects/SampleProject/Scripts'